@@ -3,10 +3,14 @@ agent.py - Fast Agent with LangChain Buffer Memory
 """
 
 import logging
+import re
+import threading
+from collections import OrderedDict
+import requests
+from requests.adapters import HTTPAdapter
 from langchain_nvidia_ai_endpoints import ChatNVIDIA
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
-from tools import ALL_TOOLS, positive_tool, negative_tool, student_marks_tool, crisis_tool
+from tools import positive_tool, negative_tool, student_marks_tool, crisis_tool
+from tools import REPORTS, find_student
 from memory import SessionManager
 
 logger = logging.getLogger(__name__)
@@ -23,6 +27,71 @@ USER MESSAGE: {message}
 
 Respond with ONLY the tool name (e.g., "positive_tool"). No explanation."""
 
+# The template has a single variable, so build prompts by concatenation
+# instead of going through ChatPromptTemplate on every call
+TOOL_SELECTOR_PROMPT_PREFIX, TOOL_SELECTOR_PROMPT_SUFFIX = TOOL_SELECTOR_PROMPT.split("{message}")
+
+
+def _select_prompt(message: str) -> str:
+    """Tool-selector prompt for a user message"""
+    return TOOL_SELECTOR_PROMPT_PREFIX + message + TOOL_SELECTOR_PROMPT_SUFFIX
+
+
+# Keyword categories in priority order - the first category that matches wins.
+# Single words are looked up in the message's token set; phrases are matched
+# by a precompiled pattern on word boundaries, so "end it" doesn't fire
+# inside "send it" or "weekend items".
+KEYWORD_TOOLS = [
+    (
+        "crisis_tool",
+        frozenset(),
+        # "suicid" is a stem: suicide, suicides, suicidal
+        re.compile(r"suicid|\b(?:kill myself|self-harm|end it|want to die)\b")
+    ),
+    (
+        "student_marks_tool",
+        frozenset({"marks", "grades", "john", "sarah", "mike", "bob", "gpa"}),
+        None
+    ),
+    (
+        "negative_tool",
+        frozenset({
+            "sad", "down", "bad", "upset", "depressed", "heartbroken",
+            "miserable", "terrible", "awful", "struggling", "hopeless",
+            # Inflected forms the old substring test used to catch
+            "sadness", "sadder", "saddest", "saddened", "upsetting",
+            "depressing", "depression", "heartbreak", "heartbreaking",
+            "miserably", "terribly", "awfully", "struggle", "struggles",
+            "struggled", "hopelessness"
+        }),
+        None
+    ),
+    (
+        "positive_tool",
+        frozenset({
+            "happy", "great", "good", "wonderful", "awesome",
+            "hi", "hello", "hey", "morning", "afternoon", "evening"
+        }),
+        None
+    ),
+]
+
+_TOKEN = re.compile(r"[a-z]+")
+
+# LLM tool picks are remembered per normalized message
+SELECTION_CACHE_SIZE = 4096
+
+# One keep-alive connection pool to the NVIDIA endpoint for the whole process
+_HTTP_SESSION = requests.Session()
+_HTTP_SESSION.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=64))
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _normalize(msg_lower: str) -> str:
+    """Cache key for a lowercased message: whitespace collapsed, truncated"""
+    return _WHITESPACE.sub(" ", msg_lower.strip())[:128]
+
 
 class ChatbotAgent:
     def __init__(self, nvidia_api_key: str):
@@ -35,11 +104,11 @@ class ChatbotAgent:
             max_tokens=50
         )
         
-        self.tool_selector = (
-            ChatPromptTemplate.from_template(TOOL_SELECTOR_PROMPT)
-            | self.llm
-            | StrOutputParser()
-        )
+        # ChatNVIDIA opens a fresh requests.Session per call by default;
+        # hand it the shared one so TLS connections are reused
+        client = getattr(self.llm, "_client", None)
+        if client is not None and hasattr(client, "get_session_fn"):
+            client.get_session_fn = lambda: _HTTP_SESSION
         
         self.tools_map = {
             "positive_tool": positive_tool,
@@ -48,33 +117,30 @@ class ChatbotAgent:
             "crisis_tool": crisis_tool
         }
         
+        # LRU of normalized message -> tool name picked by the LLM
+        self._selection_cache = OrderedDict()
+        self._selection_lock = threading.Lock()
+        
         # Using new LangChain memory
         self.session_manager = SessionManager()
         logger.info(" Agent with LangChain buffer memory initialized!")
     
     def chat(self, user_message: str, thread_id: str = "default") -> dict:
         """Process message with buffer memory"""
-        logger.info(f" Processing: {user_message}")
+        logger.info(" Processing: %s", user_message)
         
         try:
-            # Get conversation context from buffer
-            context = self.session_manager.get_history(thread_id)
-            
-            # Add context to message if exists
-            if context:
-                # Only last 3 exchanges to keep it fast
-                lines = context.split('\n')
-                recent_context = '\n'.join(lines[-6:])
-                full_message = f"{recent_context}\n\nHuman: {user_message}"
-            else:
-                full_message = user_message
+            # Lowercase once; keyword matching and tools all reuse it
+            msg_lower = user_message.lower()
             
-            # Select tool
-            tool_name = self._select_tool(user_message)
-            logger.info(f" Selected: {tool_name}")
+            # Select tool - only ask the LLM when no keyword matched
+            tool_name, confidence = self._keyword_match(msg_lower)
+            if confidence != "high":
+                tool_name = self._select_tool(user_message, msg_lower)
+            logger.info(" Selected: %s", tool_name)
             
             # Execute tool
-            bot_response = self._execute_tool(tool_name, user_message)
+            bot_response = self._execute_tool(tool_name, user_message, msg_lower)
             
             # Save to buffer memory
             self.session_manager.save_interaction(thread_id, user_message, bot_response, tool_name)
@@ -90,25 +156,41 @@ class ChatbotAgent:
             }
         
         except Exception as e:
-            logger.error(f" Error: {e}")
+            logger.error(" Error: %s", e)
             return self._fallback(user_message, thread_id)
     
-    def _select_tool(self, message: str) -> str:
-        """LLM selects tool"""
-        try:
-            response = self.tool_selector.invoke({"message": message})
-            tool_name = response.strip().lower()
-            
-            if tool_name in self.tools_map:
-                return tool_name
-            
-            return self._keyword_match(message)
+    def _select_tool(self, message: str, msg_lower: str) -> str:
+        """LLM selects tool for a message no keyword matched"""
+        normalized = _normalize(msg_lower)
+        
+        with self._selection_lock:
+            cached = self._selection_cache.get(normalized)
+            if cached is not None:
+                self._selection_cache.move_to_end(normalized)
+                return cached
         
+        default, _ = self._keyword_match(msg_lower)
+        
+        try:
+            response = self.llm.invoke(_select_prompt(message))
         except Exception as e:
-            logger.error(f"Tool selection failed: {e}")
-            return self._keyword_match(message)
+            logger.error("Tool selection failed: %s", e)
+            return default
+        
+        tool_name = response.content.strip().lower()
+        
+        if tool_name not in self.tools_map:
+            return default
+        
+        with self._selection_lock:
+            self._selection_cache[normalized] = tool_name
+            self._selection_cache.move_to_end(normalized)
+            if len(self._selection_cache) > SELECTION_CACHE_SIZE:
+                self._selection_cache.popitem(last=False)
+        
+        return tool_name
     
-    def _execute_tool(self, tool_name: str, message: str) -> str:
+    def _execute_tool(self, tool_name: str, message: str, msg_lower: str) -> str:
         """Execute tool"""
         tool = self.tools_map.get(tool_name)
         
@@ -117,48 +199,35 @@ class ChatbotAgent:
         
         try:
             if tool_name == "student_marks_tool":
-                msg_lower = message.lower()
-                for name in ["john", "sarah", "mike", "bob"]:
-                    if name in msg_lower:
-                        return tool(name)
+                # Reports are pre-rendered in tools; read one directly rather
+                # than through the @tool wrapper. Same whole-word lookup the
+                # tool uses, so "bobby" is not Bob.
+                name = find_student(msg_lower)
+                if name is not None:
+                    return REPORTS[name]
                 return "Which student? Available: John, Sarah, Mike, Bob"
             
             return tool(message)
         
         except Exception as e:
-            logger.error(f"Tool execution failed: {e}")
+            logger.error("Tool execution failed: %s", e)
             return "Sorry, I encountered an error."
     
-    def _keyword_match(self, message: str) -> str:
-        """Keyword-based fallback"""
-        msg = message.lower()
-        
-        if any(w in msg for w in ["suicide", "kill myself", "self-harm", "end it", "want to die"]):
-            return "crisis_tool"
-        
-        if any(w in msg for w in ["marks", "grades", "john", "sarah", "mike", "bob", "gpa"]):
-            return "student_marks_tool"
+    def _keyword_match(self, msg_lower: str) -> tuple:
+        """Keyword-based fallback on a lowercased message, returns (tool_name, confidence)"""
+        tokens = set(_TOKEN.findall(msg_lower))
         
-        negative_words = [
-            "sad", "down", "bad", "upset", "depressed", "heartbroken",
-            "miserable", "terrible", "awful", "struggling", "hopeless"
-        ]
-        if any(w in msg for w in negative_words):
-            return "negative_tool"
-        
-        positive_words = [
-            "happy", "great", "good", "wonderful", "awesome",
-            "hi", "hello", "hey", "morning", "afternoon", "evening"
-        ]
-        if any(w in msg for w in positive_words):
-            return "positive_tool"
+        for tool_name, words, phrases in KEYWORD_TOOLS:
+            if not words.isdisjoint(tokens) or (phrases is not None and phrases.search(msg_lower)):
+                return tool_name, "high"
         
-        return "positive_tool"
+        return "positive_tool", "low"
     
     def _fallback(self, message, thread_id):
         """Emergency fallback"""
-        tool_name = self._keyword_match(message)
-        response = self._execute_tool(tool_name, message)
+        msg_lower = message.lower()
+        tool_name, _ = self._keyword_match(msg_lower)
+        response = self._execute_tool(tool_name, message, msg_lower)
         
         self.session_manager.save_interaction(thread_id, message, response, tool_name)
         stats = self.session_manager.get_stats(thread_id)
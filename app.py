@@ -1,4 +1,5 @@
 import gradio as gr
+import json
 import requests
 
 API_URL = "http://localhost:8000"
@@ -6,39 +7,38 @@ current_user = "gradio_user_001"
 
 
 def respond(message, chat_history):
-    """Handle chat with proper format detection"""
+    """Stream the reply into the chat as tokens arrive"""
     if not message.strip():
-        return "", chat_history
+        yield "", chat_history
+        return
+    
+    chat_history.append({"role": "user", "content": message})
+    chat_history.append({"role": "assistant", "content": ""})
     
     try:
-        response = requests.post(
-            f"{API_URL}/chat",
-            json={"message": message, "thread_id": current_user},
+        with requests.post(
+            f"{API_URL}/chat/stream",
+            json={"message": message, "session_id": current_user},
+            stream=True,
             timeout=30
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            bot_reply = data.get("response", "Error")
-            tool = data.get("tool_used", "unknown")
-            full_reply = f"{bot_reply}\n\n_Tool: {tool}_"
-        else:
-            full_reply = f"Error: {response.status_code}"
+        ) as response:
+            if response.status_code == 200:
+                for line in response.iter_lines(decode_unicode=True):
+                    # The final "done" event carries metadata, not reply text
+                    if line == "event: done":
+                        break
+                    if line and line.startswith("data: "):
+                        chat_history[-1]["content"] += json.loads(line[len("data: "):])
+                        yield "", chat_history
+            else:
+                chat_history[-1]["content"] = f"Error: {response.status_code}"
     
     except requests.exceptions.ConnectionError:
-        full_reply = "ERROR: Server not running!\n\nRun: python main.py"
+        chat_history[-1]["content"] = "ERROR: Server not running!\n\nRun: python main.py"
     except Exception as e:
-        full_reply = f"Error: {str(e)}"
-    
-    # Try modern format first
-    try:
-        chat_history.append({"role": "user", "content": message})
-        chat_history.append({"role": "assistant", "content": full_reply})
-    except:
-        # Fallback to old format
-        chat_history.append([message, full_reply])
+        chat_history[-1]["content"] = f"Error: {str(e)}"
     
-    return "", chat_history
+    yield "", chat_history
 
 
 def get_stats():
@@ -114,4 +114,4 @@ if __name__ == "__main__":
     print("="*50)
     print("Make sure API is running: python main.py")
     print("="*50)
-    demo.launch(server_port=7860)
\ No newline at end of file
+    demo.launch(server_port=7860)
@@ -1,18 +1,90 @@
 """
 main.py - FastAPI Backend using memory.py
-Install: pip install fastapi uvicorn langchain langchain-anthropic python-dotenv
+Install: pip install fastapi "uvicorn[standard]" langchain langchain-anthropic python-dotenv orjson
 Run: uvicorn main:app --reload
 """
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from typing import Dict
+from collections import OrderedDict
+import asyncio
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+import time
 import uuid
 import os
-from memory import ChatMemory
+from memory import ChatMemory, MAX_SESSIONS, SESSION_TTL
 
-app = FastAPI()
+class BufferedFileHandler(logging.FileHandler):
+    """
+    FileHandler that batches writes through a 64KB buffer
+    
+    The buffer is flushed every flush_interval seconds by a background
+    timer, immediately for WARNING and above, and on close.
+    """
+    
+    def __init__(self, filename, flush_interval: float = 1.0, **kwargs):
+        self.flush_interval = flush_interval
+        self._last_flush = time.monotonic()
+        self._stop_flush = threading.Event()
+        super().__init__(filename, **kwargs)
+        
+        # Quiet servers get no new records to trigger a flush, so a timer
+        # writes the buffer out instead
+        threading.Thread(target=self._flush_loop, name="log-flush", daemon=True).start()
+    
+    def _open(self):
+        return open(
+            self.baseFilename, self.mode,
+            buffering=65536, encoding=self.encoding, errors=self.errors
+        )
+    
+    def flush(self):
+        # StreamHandler.emit calls this after every record; only let it
+        # through once the interval has passed
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self._flush_now()
+    
+    def _flush_now(self):
+        super().flush()
+        self._last_flush = time.monotonic()
+    
+    def _flush_loop(self):
+        while not self._stop_flush.wait(self.flush_interval):
+            self._flush_now()
+    
+    def emit(self, record):
+        super().emit(record)
+        if record.levelno >= logging.WARNING:
+            self._flush_now()
+    
+    def close(self):
+        self._stop_flush.set()
+        self._flush_now()
+        super().close()
+
+
+# Request handlers only enqueue log records; a listener thread does the
+# console and file I/O. Both are installed in startup_event so they belong
+# to the module uvicorn serves - `python main.py` imports this file a second
+# time as `main`, and a queue set up by the first copy would never be read.
+log_queue = queue.Queue(-1)
+log_listener = None
+
+_log_format = logging.Formatter(
+    "%(asctime)s | %(levelname)-8s | %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S"
+)
+
+logger = logging.getLogger(__name__)
+
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # Enable CORS for React frontend
 app.add_middleware(
@@ -23,8 +95,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Store ChatMemory instances per session
-sessions: Dict[str, ChatMemory] = {}
+# Store ChatMemory instances per session, least recently used first.
+# Same policy as the agent's SessionManager: at most MAX_SESSIONS, and a
+# session idle for SESSION_TTL seconds is gone.
+sessions: Dict[str, ChatMemory] = OrderedDict()
+_last_used: Dict[str, float] = {}  # session_id -> monotonic time
+
+# /sessions is polled by dashboards; reuse its encoded body briefly
+SESSIONS_CACHE_TTL = 0.5
+_sessions_cache = None  # (monotonic time, JSON bytes)
 
 class ChatRequest(BaseModel):
     message: str
@@ -44,19 +123,103 @@ class HistoryResponse(BaseModel):
     message_count: int
 
 
+@app.on_event("startup")
+async def startup_event():
+    global log_listener
+    
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(_log_format)
+    file_handler = BufferedFileHandler("chatbot.log", encoding="utf-8")
+    file_handler.setFormatter(_log_format)
+    
+    log_listener = logging.handlers.QueueListener(log_queue, stream_handler, file_handler)
+    log_listener.start()
+    logging.basicConfig(
+        level=logging.INFO,
+        handlers=[logging.handlers.QueueHandler(log_queue)]
+    )
+    logger.info("Starting server...")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Flushes records still waiting in the queue, then the file buffer
+    log_listener.stop()
+    for handler in log_listener.handlers:
+        handler.close()
+
+
+def drop_chat(session_id: str) -> bool:
+    """
+    Remove a session, returns False if it did not exist
+    """
+    global _sessions_cache
+    
+    _last_used.pop(session_id, None)
+    if sessions.pop(session_id, None) is None:
+        return False
+    _sessions_cache = None
+    return True
+
+
+def get_live_chat(session_id: str):
+    """
+    Get the ChatMemory for a session, or None if unknown or idle past SESSION_TTL
+    """
+    chat = sessions.get(session_id)
+    if chat is not None and time.monotonic() - _last_used.get(session_id, 0) >= SESSION_TTL:
+        drop_chat(session_id)
+        return None
+    return chat
+
+
+def get_or_create_chat(session_id: str) -> ChatMemory:
+    """
+    Get the ChatMemory for a session, creating it if it doesn't exist
+    """
+    global _sessions_cache
+    
+    now = time.monotonic()
+    if get_live_chat(session_id) is not None:
+        sessions.move_to_end(session_id)
+    else:
+        api_key = os.environ.get("ANTHROPIC_API_KEY")
+        if not api_key:
+            raise HTTPException(
+                status_code=500, 
+                detail="ANTHROPIC_API_KEY not found in environment"
+            )
+        
+        # Make room: drop the least recently used while over the cap or idle
+        while sessions:
+            oldest = next(iter(sessions))
+            if len(sessions) < MAX_SESSIONS and now - _last_used.get(oldest, 0) < SESSION_TTL:
+                break
+            drop_chat(oldest)
+        
+        sessions[session_id] = ChatMemory(api_key=api_key)
+        _sessions_cache = None
+    
+    _last_used[session_id] = now
+    return sessions[session_id]
+
+
 @app.get("/")
 async def root():
     return {
         "message": "LangChain Memory API Running",
         "endpoints": {
             "/chat": "POST - Send message",
+            "/chat/stream": "POST - Send message, stream response (SSE)",
             "/clear": "POST - Clear memory",
             "/history/{session_id}": "GET - Get chat history"
         }
     }
 
 
-@app.post("/chat", response_model=ChatResponse)
+# ChatResponse documents the schema only; the handler returns a ready
+# ORJSONResponse so FastAPI skips validating and re-encoding it
+@app.post("/chat", responses={200: {"model": ChatResponse}})
 async def chat(request: ChatRequest):
     """
     Send a message and get AI response with memory
@@ -64,36 +227,45 @@ async def chat(request: ChatRequest):
     try:
         # Get or create session
         session_id = request.session_id or str(uuid.uuid4())
+        chat = get_or_create_chat(session_id)
         
-        # Create new ChatMemory if session doesn't exist
-        if session_id not in sessions:
-            api_key = os.environ.get("ANTHROPIC_API_KEY")
-            if not api_key:
-                raise HTTPException(
-                    status_code=500, 
-                    detail="ANTHROPIC_API_KEY not found in environment"
-                )
-            sessions[session_id] = ChatMemory(api_key=api_key)
-        
-        # Get chat instance
-        chat = sessions[session_id]
-        
-        # Get response using LangChain memory
-        response = chat.chat(request.message)
+        # Get response using LangChain memory - the LLM call blocks,
+        # so run it off the event loop
+        response = await asyncio.to_thread(chat.chat, request.message)
         
         # Get memory size
         memory_size = chat.get_memory_size()
         
-        return ChatResponse(
-            response=response,
-            session_id=session_id,
-            memory_size=memory_size
-        )
+        return ORJSONResponse({
+            "response": response,
+            "session_id": session_id,
+            "memory_size": memory_size
+        })
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Send a message and stream the AI response as server-sent events
+    """
+    session_id = request.session_id or str(uuid.uuid4())
+    chat = get_or_create_chat(session_id)
+    
+    async def event_stream():
+        # JSON-encode chunks so newlines inside tokens don't break SSE framing
+        async for chunk in chat.astream(request.message):
+            yield f"data: {json.dumps(chunk)}\n\n"
+        
+        # Non-streamed fields go in a final "done" event
+        done = {"session_id": session_id, "memory_size": chat.get_memory_size()}
+        yield f"event: done\ndata: {json.dumps(done)}\n\n"
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 @app.post("/clear")
 async def clear_memory(request: ClearMemoryRequest):
     """
@@ -102,9 +274,10 @@ async def clear_memory(request: ClearMemoryRequest):
     try:
         session_id = request.session_id
         
-        if session_id in sessions:
+        chat = get_live_chat(session_id)
+        if chat is not None:
             # Clear memory using LangChain method
-            sessions[session_id].clear_memory()
+            chat.clear_memory()
             return {
                 "message": "Memory cleared successfully",
                 "session_id": session_id
@@ -125,14 +298,13 @@ async def get_history(session_id: str):
     Get full conversation history for a session
     """
     try:
-        if session_id not in sessions:
+        chat = get_live_chat(session_id)
+        if chat is None:
             raise HTTPException(
                 status_code=404, 
                 detail="Session not found"
             )
         
-        chat = sessions[session_id]
-        
         # Get history from LangChain memory
         history = chat.get_chat_history()
         message_count = chat.get_memory_size()
@@ -154,8 +326,7 @@ async def delete_session(session_id: str):
     """
     Delete entire session
     """
-    if session_id in sessions:
-        del sessions[session_id]
+    if drop_chat(session_id):
         return {
             "message": "Session deleted successfully",
             "session_id": session_id
@@ -169,19 +340,43 @@ async def list_sessions():
     """
     List all active sessions
     """
+    global _sessions_cache
+    
+    now = time.monotonic()
+    if _sessions_cache is not None and now - _sessions_cache[0] < SESSIONS_CACHE_TTL:
+        return Response(content=_sessions_cache[1], media_type="application/json")
+    
     session_info = []
     for session_id, chat in sessions.items():
+        if now - _last_used.get(session_id, 0) >= SESSION_TTL:
+            continue  # expired, dropped on next access
         session_info.append({
             "session_id": session_id,
             "message_count": chat.get_memory_size()
         })
     
-    return {
-        "total_sessions": len(sessions),
+    response = ORJSONResponse({
+        "total_sessions": len(session_info),
         "sessions": session_info
-    }
+    })
+    _sessions_cache = (now, response.body)
+    return response
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    
+    # Sessions live in process memory, so each worker has its own set.
+    # Raise WORKERS only behind sticky routing or a shared session store.
+    # loop/http stay on uvicorn's "auto", which picks uvloop and httptools
+    # when they are installed.
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=int(os.environ.get("WORKERS", 1)),
+        log_level="warning",
+        # One access-log line per request is pure overhead here; app logs
+        # still go through the queued handlers set up in startup_event
+        access_log=False
+    )
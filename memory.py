@@ -2,15 +2,51 @@
 memory.py - LangChain Memory Implementation
 """
 
-from langchain.memory import ConversationBufferMemory
+from langchain.memory import ConversationBufferMemory, ConversationBufferWindowMemory
 from langchain_anthropic import ChatAnthropic
 from langchain.chains import ConversationChain
-from langchain.prompts import PromptTemplate
+from langchain_core.messages import AIMessage, HumanMessage
+from collections import Counter, OrderedDict
+from datetime import datetime
+from functools import lru_cache
+import logging
 import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Exchanges sent to Claude as conversation context; older turns stay in
+# memory for history views but are no longer re-sent every turn
+HISTORY_WINDOW = 10
+
+# Idle seconds before a session expires
+SESSION_TTL = 3600
+
+# Most sessions kept in memory; the least recently active go first
+MAX_SESSIONS = 10_000
+
+# Seconds a computed get_stats result is reused (dashboards poll it)
+STATS_TTL = 0.5
+
+
+@lru_cache(maxsize=None)
+def get_shared_llm(api_key: str) -> ChatAnthropic:
+    """
+    Get the Claude client for an API key, built once per process
+    
+    The client is stateless between calls, so every ChatMemory can share it
+    and only keep its own memory.
+    """
+    return ChatAnthropic(
+        model="claude-sonnet-4-20250514",
+        anthropic_api_key=api_key,
+        max_tokens=1000,
+        temperature=0.7
+    )
 
 
 class ChatMemory:
-    """Chat memory manager using LangChain ConversationBufferMemory"""
+    """Chat memory manager using LangChain ConversationBufferWindowMemory"""
     
     def __init__(self, api_key: str = None):
         """Initialize chat with LangChain memory"""
@@ -18,16 +54,13 @@ class ChatMemory:
         # Set API key
         self.api_key = api_key or os.environ.get("ANTHROPIC_API_KEY")
         
-        # Initialize Claude LLM
-        self.llm = ChatAnthropic(
-            model="claude-sonnet-4-20250514",
-            anthropic_api_key=self.api_key,
-            max_tokens=1000,
-            temperature=0.7
-        )
+        # Shared Claude LLM - one client for all sessions
+        self.llm = get_shared_llm(self.api_key)
         
-        # Create LangChain ConversationBufferMemory
-        self.memory = ConversationBufferMemory(
+        # Create LangChain window memory - only the last HISTORY_WINDOW
+        # exchanges go into the prompt
+        self.memory = ConversationBufferWindowMemory(
+            k=HISTORY_WINDOW,
             memory_key="chat_history",
             return_messages=True,
             output_key="response"
@@ -37,7 +70,7 @@ class ChatMemory:
         self.conversation = ConversationChain(
             llm=self.llm,
             memory=self.memory,
-            verbose=True
+            verbose=False
         )
     
     def chat(self, user_input: str) -> str:
@@ -53,6 +86,26 @@ class ChatMemory:
         response = self.conversation.predict(input=user_input)
         return response
     
+    async def astream(self, user_input: str):
+        """
+        Stream the AI response as it is generated, then save the turn
+        
+        Args:
+            user_input: User's message
+            
+        Yields:
+            Response text chunks
+        """
+        history = self.memory.load_memory_variables({})["chat_history"]
+        messages = history + [HumanMessage(content=user_input)]
+        chunks = []
+        
+        async for chunk in self.llm.astream(messages):
+            chunks.append(chunk.content)
+            yield chunk.content
+        
+        self.save_context(user_input, "".join(chunks))
+    
     def get_chat_history(self) -> str:
         """
         Get full conversation history from memory
@@ -60,7 +113,8 @@ class ChatMemory:
         Returns:
             Formatted chat history string
         """
-        return self.memory.load_memory_variables({})["chat_history"]
+        # The window only limits the prompt; the full log is still kept
+        return self.memory.chat_memory.messages
     
     def clear_memory(self):
         """Clear all conversation history from memory"""
@@ -81,9 +135,211 @@ class ChatMemory:
     
     def get_memory_size(self) -> int:
         """Get number of messages in memory"""
-        history = self.memory.load_memory_variables({})
-        messages = history.get("chat_history", [])
-        return len(messages)
+        return len(self.memory.chat_memory.messages)
+
+
+class SessionManager:
+    """Per-thread LangChain buffer memory for the tool agent"""
+    
+    def __init__(self):
+        """Start with no sessions; they are created on first message"""
+        # Ordered by last activity, oldest first
+        self.sessions = OrderedDict()
+        
+        # thread_id -> (monotonic time, stats dict); dropped on every change
+        self._stats_cache = {}
+        
+        logger.info("SessionManager started - Ready for multiple users!")
+    
+    def get_or_create_session(self, thread_id: str, now: str = None) -> dict:
+        """
+        Get the session for a thread, creating it if needed
+        
+        Args:
+            thread_id: Conversation/user identifier
+            now: ISO timestamp for a new session (taken from the clock if omitted)
+            
+        Returns:
+            Session dict holding memory and tool usage
+        """
+        # Fast path: existing session, no lock needed
+        session = self._live_session(thread_id)
+        if session is not None:
+            session["touched"] = time.monotonic()
+            try:
+                self.sessions.move_to_end(thread_id)
+            except KeyError:
+                pass  # evicted by another thread meanwhile; caller keeps its copy
+            return session
+        
+        self._evict_idle()
+        new = self._make_session(now or datetime.now().isoformat())
+        
+        # setdefault is atomic under the GIL: if two requests for the same
+        # thread race here, both get whichever session was stored first
+        session = self.sessions.setdefault(thread_id, new)
+        if session is new:
+            logger.info("New session created for: %s", thread_id)
+        return session
+    
+    def _live_session(self, thread_id: str):
+        """Get a thread's session, or None if unknown or idle past SESSION_TTL"""
+        session = self.sessions.get(thread_id)
+        if session is not None and time.monotonic() - session["touched"] >= SESSION_TTL:
+            # Expired but not yet evicted - treat it as gone
+            self._evict(thread_id)
+            return None
+        return session
+    
+    def _make_session(self, now: str) -> dict:
+        """Build an empty session created at the given ISO timestamp"""
+        return {
+            "memory": ConversationBufferMemory(return_messages=True),
+            "transcript": [],
+            "history_text": "",
+            "tools_history": [],
+            "tools_used": Counter(),
+            "message_count": 0,
+            "created_at": now,
+            "last_active": now,
+            "touched": time.monotonic()
+        }
+    
+    def _evict_idle(self):
+        """Drop least recently active sessions past SESSION_TTL or MAX_SESSIONS"""
+        now = time.monotonic()
+        while self.sessions:
+            try:
+                thread_id, session = next(iter(self.sessions.items()))
+            except (StopIteration, RuntimeError):
+                # Emptied or reordered by another thread between iter() and
+                # next(); the next new session retries the eviction
+                break
+            if len(self.sessions) < MAX_SESSIONS and now - session["touched"] < SESSION_TTL:
+                break
+            self._evict(thread_id)
+    
+    def _evict(self, thread_id: str):
+        """Drop one session and its cached stats"""
+        if self.sessions.pop(thread_id, None) is not None:
+            logger.info("Evicted idle session: %s", thread_id)
+        self._stats_cache.pop(thread_id, None)
+    
+    def save_interaction(self, thread_id: str, user_message: str, bot_response: str, tool_name: str):
+        """
+        Save one user/bot exchange and the tool that produced it
+        
+        Args:
+            thread_id: Conversation/user identifier
+            user_message: User's message
+            bot_response: Bot's reply
+            tool_name: Tool used for the reply
+        """
+        now = datetime.now().isoformat()
+        session = self.get_or_create_session(thread_id, now)
+        
+        session["memory"].save_context(
+            {"input": user_message},
+            {"output": bot_response}
+        )
+        session["message_count"] += 2  # human + AI
+        session["transcript"].append(f"Human: {user_message}\nAI: {bot_response}")
+        session["history_text"] = None
+        
+        session["tools_history"].append(tool_name)
+        session["tools_used"][tool_name] += 1
+        
+        session["last_active"] = now
+        self._stats_cache.pop(thread_id, None)
+        logger.info("Saved interaction for %s (used: %s)", thread_id, tool_name)
+    
+    def get_history(self, thread_id: str) -> str:
+        """
+        Get full conversation history for a thread
+        
+        Returns:
+            "Human:"/"AI:" transcript, empty if the thread is unknown
+        """
+        session = self._live_session(thread_id)
+        if session is None:
+            return ""
+        
+        # Each exchange is rendered once when saved; the joined text is
+        # cached until the next save
+        if session["history_text"] is None:
+            session["history_text"] = "\n".join(session["transcript"])
+        return session["history_text"]
+    
+    def get_detailed_history(self, thread_id: str) -> dict:
+        """
+        Get history as a list of exchanges with the tool used for each
+        
+        Returns:
+            Dict with total_messages and a conversation list
+        """
+        session = self._live_session(thread_id)
+        if session is None:
+            return {"thread_id": thread_id, "total_messages": 0, "conversation": []}
+        
+        messages = session["memory"].chat_memory.messages
+        humans = [m for m in messages if isinstance(m, HumanMessage)]
+        ais = [m for m in messages if isinstance(m, AIMessage)]
+        
+        conversation = [
+            {
+                "message_id": i,
+                "user_query": human.content,
+                "bot_response": ai.content,
+                "tool_used": tool_name
+            }
+            for i, (human, ai, tool_name) in enumerate(
+                zip(humans, ais, session["tools_history"]), 1
+            )
+        ]
+        
+        return {
+            "thread_id": thread_id,
+            "total_messages": len(messages),
+            "conversation": conversation
+        }
+    
+    def get_stats(self, thread_id: str) -> dict:
+        """Get message count and tool usage for a thread"""
+        session = self._live_session(thread_id)
+        if session is None:
+            return {"session_id": thread_id, "message_count": 0, "tools_used": {}}
+        
+        cached = self._stats_cache.get(thread_id)
+        if cached is not None and time.monotonic() - cached[0] < STATS_TTL:
+            return cached[1]
+        
+        stats = {
+            "session_id": thread_id,
+            "message_count": session["message_count"],
+            "tools_used": dict(session["tools_used"]),
+            "created_at": session["created_at"],
+            "last_active": session["last_active"]
+        }
+        self._stats_cache[thread_id] = (time.monotonic(), stats)
+        return stats
+    
+    def clear_session(self, thread_id: str) -> bool:
+        """Delete a thread's session, returns False if it did not exist"""
+        self._stats_cache.pop(thread_id, None)
+        
+        if thread_id in self.sessions:
+            del self.sessions[thread_id]
+            logger.info("Cleared session: %s", thread_id)
+            return True
+        return False
+    
+    def list_all_sessions(self) -> list:
+        """List all active thread ids"""
+        now = time.monotonic()
+        return [
+            thread_id for thread_id, session in list(self.sessions.items())
+            if now - session["touched"] < SESSION_TTL
+        ]
 
 
 # Example usage
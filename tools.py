@@ -3,22 +3,24 @@ tools.py - The Chatbot's Tools
 """
 
 from langchain.tools import tool
+from functools import lru_cache
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
+# Positive-reply triggers, checked in priority order; each is one C-level scan
+_HAPPY_RE = re.compile(r"happy|great")
+_MOTIVATE_RE = re.compile(r"motivat|inspire")
 
-@tool
-def positive_tool(query: str) -> str:
-    """This tool handles HAPPY and POSITIVE messages. When someone says I'm happy or motivate me, this tool responds."""
-    logger.info(" Positive tool activated!")
-    
-    query_lower = query.lower()
-    
-    if "happy" in query_lower or "great" in query_lower:
+
+@lru_cache(maxsize=1024)
+def _positive_response(query_lower: str) -> str:
+    """Pick the positive reply for a lowercased, stripped query"""
+    if _HAPPY_RE.search(query_lower):
         return " That's wonderful! Keep that positive energy going! Your happiness is inspiring!"
     
-    elif "motivat" in query_lower or "inspire" in query_lower:
+    elif _MOTIVATE_RE.search(query_lower):
         return "You've got this! Every small step counts. Keep pushing forward - you're stronger than you think!"
     
     else:
@@ -26,11 +28,14 @@ def positive_tool(query: str) -> str:
 
 
 @tool
-def negative_tool(query: str) -> str:
-    """This tool handles SAD and NEGATIVE emotions. When someone says I'm sad or I feel down, this tool responds with empathy."""
-    logger.info(" Negative/empathy tool activated!")
+def positive_tool(query: str) -> str:
+    """This tool handles HAPPY and POSITIVE messages. When someone says I'm happy or motivate me, this tool responds."""
+    logger.info(" Positive tool activated!")
     
-    return """I hear you, and your feelings are completely valid. 
+    return _positive_response(query.lower().strip())
+
+
+_NEGATIVE_RESPONSE = """I hear you, and your feelings are completely valid. 
 
 Remember:
 - It's okay to not be okay sometimes
@@ -43,53 +48,47 @@ Tomorrow is a new day with new possibilities. """
 
 
 @tool
-def student_marks_tool(student_name: str) -> str:
-    """This tool looks up STUDENT GRADES. When someone asks What are John's marks, this tool finds the answer. Available students: John, Sarah, Mike, Bob."""
-    logger.info(f"Student marks tool activated for: {student_name}")
+def negative_tool(query: str) -> str:
+    """This tool handles SAD and NEGATIVE emotions. When someone says I'm sad or I feel down, this tool responds with empathy."""
+    logger.info(" Negative/empathy tool activated!")
     
-    students = {
-        "john": {
-            "Math": 85,
-            "Science": 92,
-            "English": 78,
-            "History": 88,
-            "GPA": 3.6
-        },
-        "sarah": {
-            "Math": 95,
-            "Science": 89,
-            "English": 91,
-            "History": 87,
-            "GPA": 3.9
-        },
-        "mike": {
-            "Math": 72,
-            "Science": 68,
-            "English": 85,
-            "History": 79,
-            "GPA": 3.0
-        },
-        "bob": {
-            "Math": 99,
-            "Science": 77,
-            "English": 88,
-            "History": 99,
-            "GPA": 4.0
-        }
+    return _NEGATIVE_RESPONSE
+
+
+STUDENTS = {
+    "john": {
+        "Math": 85,
+        "Science": 92,
+        "English": 78,
+        "History": 88,
+        "GPA": 3.6
+    },
+    "sarah": {
+        "Math": 95,
+        "Science": 89,
+        "English": 91,
+        "History": 87,
+        "GPA": 3.9
+    },
+    "mike": {
+        "Math": 72,
+        "Science": 68,
+        "English": 85,
+        "History": 79,
+        "GPA": 3.0
+    },
+    "bob": {
+        "Math": 99,
+        "Science": 77,
+        "English": 88,
+        "History": 99,
+        "GPA": 4.0
     }
-    
-    name = student_name.lower().strip()
-    
-    for student in students.keys():
-        if student in name:
-            name = student
-            break
-    
-    if name not in students:
-        return f"Student '{student_name}' not found.\n\nAvailable students: John, Sarah, Mike, Bob"
-    
-    marks = students[name]
-    
+}
+
+
+def _render_report(name: str, marks: dict) -> str:
+    """Format one student's academic report"""
     result = f"\n Academic Report for {name.title()}\n"
     result += "=" * 45 + "\n\n"
     
@@ -104,12 +103,32 @@ def student_marks_tool(student_name: str) -> str:
     return result
 
 
+# Grades are static, so every report is rendered once at import
+REPORTS = {name: _render_report(name, marks) for name, marks in STUDENTS.items()}
+_NAMES = frozenset(STUDENTS)
+_NAME_TOKEN = re.compile(r"[a-z]+")
+
+
+def find_student(text: str):
+    """Name of the first known student in text (whole words only), or None"""
+    tokens = _NAME_TOKEN.findall(text.lower())
+    return next((t for t in tokens if t in _NAMES), None)
+
+
 @tool
-def crisis_tool(query: str) -> str:
-    """IMPORTANT: This tool provides crisis support. When someone mentions self-harm or suicide, this tool provides help resources."""
-    logger.warning(" CRISIS TOOL ACTIVATED - Someone may need help!")
+def student_marks_tool(student_name: str) -> str:
+    """This tool looks up STUDENT GRADES. When someone asks What are John's marks, this tool finds the answer. Available students: John, Sarah, Mike, Bob."""
+    logger.info("Student marks tool activated for: %s", student_name)
     
-    return """
+    match = find_student(student_name)
+    
+    if match is not None:
+        return REPORTS[match]
+    
+    return f"Student '{student_name}' not found.\n\nAvailable students: John, Sarah, Mike, Bob"
+
+
+_CRISIS_RESPONSE = """
 🆘 IMMEDIATE CRISIS SUPPORT RESOURCES
 ==========================================
 
@@ -141,6 +160,14 @@ This feeling is temporary. Help is available. You matter.
 """
 
 
+@tool
+def crisis_tool(query: str) -> str:
+    """IMPORTANT: This tool provides crisis support. When someone mentions self-harm or suicide, this tool provides help resources."""
+    logger.warning(" CRISIS TOOL ACTIVATED - Someone may need help!")
+    
+    return _CRISIS_RESPONSE
+
+
 ALL_TOOLS = [
     positive_tool,
     negative_tool,